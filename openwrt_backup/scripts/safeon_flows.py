@@ -3,10 +3,10 @@
 import subprocess
 import time
 import json
+import re
 import paho.mqtt.client as mqtt
 from datetime import datetime, timezone, timedelta
-import os
-import signal
+import threading
 
 BROKER_IP = "192.168.0.102"   # your MQTT broker
 BROKER_PORT = 1883
@@ -16,32 +16,78 @@ TOPIC = "safeon/flows"
 
 IFACE = "br-lan"
 WINDOW = 10  # seconds per window
+# only IPv4 TCP/UDP carries the ip.port pairs we parse; let BPF drop the rest
+CAPTURE_FILTER = "ip and (tcp or udp)"
 
 KST = timezone(timedelta(hours=9))
 
+# <ts> IP <src ip>.<port> > <dst ip>.<port>: ... [<length>]
+LINE_RE = re.compile(
+    rb"^(\d+\.\d+) IP (\d+\.\d+\.\d+\.\d+)\.(\d+) > (\d+\.\d+\.\d+\.\d+)\.(\d+):.*?(?: (\d+))?\s*$"
+)
+
 
 def iso(ts: float) -> str:
     return datetime.fromtimestamp(ts, tz=KST).isoformat()
 
 
+def collect_flows(stream, flows):
+    # Runs in a reader thread while tcpdump is still capturing, so parsing
+    # overlaps the window instead of starting after it. Lines stay as bytes;
+    # IPs are only decoded once per flow when the window is published.
+    for line in stream:
+        m = LINE_RE.match(line)
+        if m is None:
+            continue
+
+        ts = float(m.group(1))
+        src_ip = m.group(2)
+        src_port = int(m.group(3))
+        dst_ip = m.group(4)
+        dst_port = int(m.group(5))
+
+        # You can parse proto from the line if you want; keep 6 for now
+        proto = 6  # pretend TCP
+
+        # last token usually length
+        plen = int(m.group(6)) if m.group(6) else 0
+
+        # key = 5-tuple (flow); bucket is global for this window
+        key = (src_ip, dst_ip, src_port, dst_port, proto)
+
+        # F = [start, end, packet_count, byte_count]
+        F = flows.get(key)
+        if F is None:
+            F = flows[key] = [ts, ts, 0, 0]
+
+        F[2] += 1
+        F[3] += plen
+        if ts < F[0]:
+            F[0] = ts
+        if ts > F[1]:
+            F[1] = ts
+
+
 # MQTT client
 client = mqtt.Client()
 client.username_pw_set(MQTT_USER, MQTT_PASS)
 client.connect(BROKER_IP, BROKER_PORT, 60)
+client.loop_start()
 
 time_bucket = 0  # increases once per 10s window
 
 while True:
-    TMP = "/tmp/window.txt"
-    if os.path.exists(TMP):
-        os.remove(TMP)
+    flows = {}
 
-    # Start tcpdump in background
+    # Start tcpdump in background and parse its output as it arrives
     tcp = subprocess.Popen(
-        ["tcpdump", "-i", IFACE, "-nn", "-tt", "-q"],
-        stdout=open(TMP, "w"),
-        stderr=subprocess.DEVNULL
+        ["tcpdump", "-i", IFACE, "-nn", "-tt", "-q", CAPTURE_FILTER],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        bufsize=1 << 16,
     )
+    reader = threading.Thread(target=collect_flows, args=(tcp.stdout, flows), daemon=True)
+    reader.start()
 
     # Capture for WINDOW seconds
     time.sleep(WINDOW)
@@ -53,104 +99,42 @@ while True:
     except Exception:
         tcp.kill()
 
+    # tcpdump exiting closes the pipe, which ends the reader loop
+    reader.join()
+    tcp.stdout.close()
+
     # This window's bucket ID
     current_bucket = time_bucket
     time_bucket += 1
 
-    # Read lines
-    try:
-        with open(TMP) as f:
-            lines = f.read().splitlines()
-    except Exception:
-        continue
-
-    flows = {}
-    first_ts = None
-
-    for line in lines:
-        parts = line.split()
-        if len(parts) < 5:
-            continue
-
-        # <ts> IP src > dst: ...
-        if parts[1] != "IP":
-            continue
-
-        try:
-            ts = float(parts[0])
-        except Exception:
-            continue
-
-        if first_ts is None:
-            first_ts = ts
-
-        src_full = parts[2]
-        dst_full = parts[4].rstrip(":")
-
-        # Parse src/dst ip + port
-        try:
-            s = src_full.split(".")
-            d = dst_full.split(".")
-
-            src_ip = ".".join(s[:4])
-            src_port = int(s[4])
-
-            dst_ip = ".".join(d[:4])
-            dst_port = int(d[4])
-        except Exception:
-            continue
-
-        # You can parse proto from the line if you want; keep 6 for now
-        proto = 6  # pretend TCP
-
-        # last token usually length
-        try:
-            plen = int(parts[-1])
-        except Exception:
-            plen = 0
-
-        # key = 5-tuple (flow); bucket is global for this window
-        key = (src_ip, dst_ip, src_port, dst_port, proto)
-
-        if key not in flows:
-            flows[key] = {
-                "start": ts,
-                "end": ts,
-                "pc": 0,
-                "bc": 0,
-            }
-
-        F = flows[key]
-        F["pc"] += 1
-        F["bc"] += plen
-        if ts < F["start"]:
-            F["start"] = ts
-        if ts > F["end"]:
-            F["end"] = ts
-
     # Send flows via MQTT for this window
-    for (src_ip, dst_ip, src_port, dst_port, proto), F in flows.items():
-        dur = max(0.000001, F["end"] - F["start"])
-        pps = F["pc"] / dur
-        bps = F["bc"] / dur
+    # one JSONL publish per window; the backend splits the payload by line
+    lines_out = []
+    for (src_ip, dst_ip, src_port, dst_port, proto), (start, end, pc, bc) in flows.items():
+        dur = max(0.000001, end - start)
+        pps = pc / dur
+        bps = bc / dur
 
         msg = {
-            "src_ip": src_ip,
-            "dst_ip": dst_ip,
+            "src_ip": src_ip.decode(),
+            "dst_ip": dst_ip.decode(),
             "src_port": src_port,
             "dst_port": dst_port,
             "proto": proto,
             "time_bucket": current_bucket,
-            "start_time": iso(F["start"]),
-            "end_time": iso(F["end"]),
+            "start_time": iso(start),
+            "end_time": iso(end),
             "duration": dur,
-            "packet_count": F["pc"],
-            "byte_count": F["bc"],
+            "packet_count": pc,
+            "byte_count": bc,
             "pps": pps,
             "bps": bps,
         }
 
-        client.publish(TOPIC, json.dumps(msg))
+        lines_out.append(json.dumps(msg, separators=(",", ":")))
+
+    if lines_out:
+        client.publish(TOPIC, "\n".join(lines_out))
 
     # tiny pause before next window (not really needed)
     time.sleep(0.1)
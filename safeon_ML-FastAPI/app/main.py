@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
@@ -25,6 +25,19 @@ class PredictionRequest(BaseModel):
     )
 
 
+class BatchPredictionRequest(BaseModel):
+    """Payload schema for scoring several flows in one request."""
+
+    user_id: Optional[str] = Field(
+        default=None, description="Unique identifier for the request originator"
+    )
+    flows: List[FlowFeatures]
+    timestamp: Optional[datetime] = Field(
+        default=None,
+        description="Optional timestamp (UTC) when the features were generated",
+    )
+
+
 class PredictionResponse(BaseModel):
     """Response schema returned to consuming services."""
 
@@ -73,6 +86,26 @@ def predict(payload: PredictionRequest) -> PredictionResponse:
     return PredictionResponse(**result)
 
 
+@app.post(
+    "/predict/batch",
+    response_model=List[PredictionResponse],
+    summary="Run model inference on a batch of flows",
+)
+def predict_batch(payload: BatchPredictionRequest) -> List[PredictionResponse]:
+    """Score all flows with a single pass through each model."""
+
+    try:
+        results = model_service.predict_batch(
+            payload.flows, user_id=payload.user_id, timestamp=payload.timestamp
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    return [PredictionResponse(**result) for result in results]
+
+
 @app.get("/docs", include_in_schema=False)
 def overridden_swagger() -> dict:
     """Redirect default docs path to FastAPI's Swagger UI."""
@@ -3,7 +3,7 @@ import logging
 import os
 import threading
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import paho.mqtt.client as mqtt
 
@@ -115,75 +115,97 @@ class MQTTBridge:
 
     def _on_message(self, _client: mqtt.Client, _userdata: Any, msg: mqtt.MQTTMessage) -> None:
         payload = msg.payload.decode("utf-8", errors="ignore")
+        requests: List[Dict[str, Any]] = []
         for line in payload.splitlines():
             line = line.strip()
             if not line:
                 continue
-            self._process_line(line)
+            request = self._parse_line(line)
+            if request is not None:
+                requests.append(request)
+        if requests:
+            self._process_requests(requests)
 
     # -----------------------------------------------------
     # Helpers
     # -----------------------------------------------------
-    def _process_line(self, line: str) -> None:
+    def _parse_line(self, line: str) -> Optional[Dict[str, Any]]:
         try:
             data = json.loads(line)
         except json.JSONDecodeError:
             LOGGER.warning("Skipping invalid JSONL line: %s", line)
-            return
-
-        flow_data: Dict[str, Any]
-        user_id: Optional[str] = None
-        ts_val: Optional[datetime] = None
-        request_id: Optional[str] = None
-        packet_meta_id: Optional[str] = None
-        device_id: Optional[str] = None
-
-        if isinstance(data, dict):
-            flow_data = data.get("flow", data)
-            user_id = data.get("user_id") or data.get("userId")
-            request_id = data.get("id") or data.get("request_id") or data.get("requestId")
-            packet_meta_id = data.get("packet_meta_id") or data.get("packetMetaId")
-            device_id = data.get("device_id") or data.get("deviceId")
-            ts_val = self._parse_timestamp(
-                data.get("timestamp") or data.get("ts") or flow_data.get("start_time")
-            )
-        else:
+            return None
+
+        if not isinstance(data, dict):
             LOGGER.warning("Skipping non-object JSONL line: %s", data)
-            return
+            return None
 
-        try:
-            flow = FlowFeatures(**flow_data)
-            inference_ts = ts_val or datetime.now(timezone.utc)
-            result = self.model_service.predict(
-                flow,
-                user_id=user_id,
-                timestamp=inference_ts,
-                packet_meta_id=packet_meta_id,
-            )
-            response = {
-                "packet_meta_id": packet_meta_id,
-                "device_id": device_id,
+        flow_data = data.get("flow", data)
+        return {
+            "flow_data": flow_data,
+            "packet_meta_id": data.get("packet_meta_id") or data.get("packetMetaId"),
+            "device_id": data.get("device_id") or data.get("deviceId"),
+            "ts_val": self._parse_timestamp(
+                data.get("timestamp") or data.get("ts") or flow_data.get("start_time")
+            ),
+        }
+
+    def _process_requests(self, requests: List[Dict[str, Any]]) -> None:
+        # A JSONL payload usually carries a whole capture window, so every valid flow in it
+        # is scored with one predict_batch call; results are still published line by line.
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        flows: List[FlowFeatures] = []
+        flow_indices: List[int] = []
+        for idx, request in enumerate(requests):
+            try:
+                flows.append(FlowFeatures(**request["flow_data"]))
+                flow_indices.append(idx)
+            except Exception as exc:  # noqa: BLE001
+                LOGGER.warning("Failed to process MQTT request: %s", exc)
+                responses[idx] = self._error_response(request, exc)
+
+        for idx, result in zip(flow_indices, self._predict_flows(flows)):
+            request = requests[idx]
+            if isinstance(result, Exception):
+                responses[idx] = self._error_response(request, result)
+                continue
+            inference_ts = request["ts_val"] or datetime.now(timezone.utc)
+            responses[idx] = {
+                "packet_meta_id": request["packet_meta_id"],
+                "device_id": request["device_id"],
                 "iso_score": result.get("iso_score"),
                 "rf_score": result.get("rf_score"),
                 "hybrid_score": result.get("hybrid_score"),
                 "is_anom": result.get("is_anom"),
                 "timestamp": inference_ts.isoformat(),
             }
-        except Exception as exc:  # noqa: BLE001
-            LOGGER.warning("Failed to process MQTT request: %s", exc)
-            fallback_ts = datetime.now(timezone.utc)
-            response = {
-                "packet_meta_id": packet_meta_id,
-                "device_id": device_id,
-                "iso_score": 0.0,
-                "rf_score": 0.0,
-                "hybrid_score": 0.0,
-                "is_anom": False,
-                "timestamp": fallback_ts.isoformat(),
-                "error": str(exc),
-            }
 
-        self._publish_result(response)
+        for response in responses:
+            if response is not None:
+                self._publish_result(response)
+
+    def _predict_flows(self, flows: List[FlowFeatures]) -> List[Any]:
+        if not flows:
+            return []
+        try:
+            return self.model_service.predict_batch(flows)
+        except Exception as exc:  # noqa: BLE001
+            # Not retried flow by flow: the batch may already have advanced per-flow delta state.
+            LOGGER.warning("Failed to process MQTT request batch: %s", exc)
+            return [exc] * len(flows)
+
+    def _error_response(self, request: Dict[str, Any], exc: Exception) -> Dict[str, Any]:
+        fallback_ts = datetime.now(timezone.utc)
+        return {
+            "packet_meta_id": request["packet_meta_id"],
+            "device_id": request["device_id"],
+            "iso_score": 0.0,
+            "rf_score": 0.0,
+            "hybrid_score": 0.0,
+            "is_anom": False,
+            "timestamp": fallback_ts.isoformat(),
+            "error": str(exc),
+        }
 
     def _publish_result(self, payload: Dict[str, Any]) -> None:
         compact = {k: v for k, v in payload.items() if v is not None}
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# `app` 패키지를 설치 없이 import할 수 있도록 서비스 루트를 경로에 올린다.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,208 @@
+import json
+import shutil
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+
+import app.model as model_module
+from app.model import FlowFeatures, FusedForestScorer, ModelService
+
+
+def make_service(**kwargs) -> ModelService:
+    with warnings.catch_warnings():
+        # 번들 아티팩트는 다른 scikit-learn 버전으로 저장되어 있다.
+        warnings.simplefilter("ignore")
+        return ModelService(database_url=None, **kwargs)
+
+
+def make_flow(**overrides) -> FlowFeatures:
+    fields = {
+        "src_ip": "192.168.0.15",
+        "dst_ip": "192.168.0.103",
+        "src_port": 58304,
+        "dst_port": 80,
+        "proto": "TCP",
+        "packet_count": 175,
+        "byte_count": 34321,
+        "pps": 173.42,
+        "bps": 33792.41,
+    }
+    fields.update(overrides)
+    return FlowFeatures(**fields)
+
+
+@pytest.fixture(scope="module")
+def loaded_service_factory():
+    if not make_service().model_loaded:
+        pytest.skip("bundled model artifacts are not available")
+    return make_service
+
+
+def test_negative_bps_scores_like_batch(loaded_service_factory):
+    flow = make_flow(bps=-5.0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        single = loaded_service_factory().predict(flow)
+        batch = loaded_service_factory().predict_batch([flow])[0]
+    assert single == batch
+    assert 0.0 <= single["hybrid_score"] <= 1.0
+
+
+
+def test_infinite_bps_is_left_to_sklearn(loaded_service_factory):
+    # log1p(-1) = -inf. 융합 스코어러가 임의의 점수를 만들지 않고 sklearn의 입력 검증을 그대로 따라야 한다.
+    flow = make_flow(bps=-1.0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        single = loaded_service_factory().predict(flow)
+        batch = loaded_service_factory().predict_batch([flow])[0]
+    assert single == batch
+    assert single["rf_score"] is None
+
+
+def test_recomputed_iso_span_matches_meta(loaded_service_factory, tmp_path):
+    source = make_service()
+    if not source.dataset_path.exists():
+        pytest.skip("bundled dataset is not available")
+    meta = json.loads(source.paths.meta.read_text())
+
+    # meta.json 없이 아티팩트만 복사하면 로드 시 데이터셋에서 ISO 스팬을 다시 계산한다.
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    for name in ("enc_src_ip.pkl", "enc_dst_ip.pkl", "scaler.pkl", "isolation_forest.pkl", "rf_model.pkl"):
+        shutil.copy(source.model_dir / name, model_dir / name)
+    service = make_service(model_dir=model_dir)
+
+    assert service.iso_decision_min == meta["iso_decision_min"]
+    assert service.iso_decision_max == meta["iso_decision_max"]
+
+
+def test_span_scaling_matches_scaler_transform(loaded_service_factory):
+    service = loaded_service_factory()
+    rng = np.random.default_rng(0)
+    features = rng.uniform(0.0, 50_000.0, size=(2048, len(service.feature_columns)))
+    expected = np.ascontiguousarray(service.scaler.transform(features), dtype=np.float32)
+
+    scaled = service._scale_to_float32(features.copy())
+
+    assert scaled.dtype == np.float32 and scaled.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(scaled, expected)
+
+
+
+def assert_fused_matches_sklearn(fused, iso_model, rf_model, samples):
+    iso_expected = iso_model.decision_function(samples)
+    rf_expected = rf_model.predict_proba(samples)[:, 1] if rf_model is not None else None
+
+    iso_batch, rf_batch = fused.score_batch(samples)
+    np.testing.assert_array_equal(iso_batch, iso_expected)
+    for i, row in enumerate(samples):
+        iso_raw, rf_proba = fused.score(row)
+        assert iso_raw == iso_expected[i]
+        assert rf_proba == (rf_expected[i] if rf_expected is not None else None)
+    if rf_expected is None:
+        assert rf_batch is None
+    else:
+        np.testing.assert_array_equal(rf_batch, rf_expected)
+
+
+def test_fused_scorer_matches_bundled_forests(loaded_service_factory):
+    service = loaded_service_factory()
+    fused = FusedForestScorer(service.iso_model, service.rf_model)
+    # score_batch가 여러 블록으로 나뉘도록 FUSED_BATCH_ROWS보다 많은 행을 쓴다.
+    rng = np.random.default_rng(1)
+    samples = rng.uniform(-0.1, 1.1, size=(model_module.FUSED_BATCH_ROWS + 200, len(service.feature_columns)))
+    assert_fused_matches_sklearn(fused, service.iso_model, service.rf_model, samples.astype(np.float32))
+
+
+@pytest.mark.parametrize("with_rf", [True, False])
+def test_fused_scorer_matches_feature_subsampled_forest(with_rf):
+    # max_features < 1.0이면 트리마다 estimators_features_로 원래 특성 인덱스를 다시 매핑해야 한다.
+    rng = np.random.default_rng(2)
+    features = rng.normal(size=(400, 6)).astype(np.float32)
+    labels = (features[:, 0] + features[:, 3] > 0).astype(int)
+    iso_model = IsolationForest(n_estimators=30, max_features=0.5, random_state=0).fit(features)
+    rf_model = None
+    if with_rf:
+        rf_model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(features, labels)
+    fused = FusedForestScorer(iso_model, rf_model)
+
+    assert_fused_matches_sklearn(fused, iso_model, rf_model, rng.normal(size=(300, 6)).astype(np.float32))
+
+
+def test_corrupted_fused_scorer_falls_back_to_sklearn(loaded_service_factory, monkeypatch):
+    flow = make_flow()
+    expected_single = loaded_service_factory().predict(flow)
+    expected_batch = loaded_service_factory().predict_batch([flow, make_flow(bps=10.0)])
+    original_init = FusedForestScorer.__init__
+
+    def corrupted_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        # 임계값을 틀어 두면 verify가 sklearn과 다른 결과를 보고 융합 스코어러를 버려야 한다.
+        self.threshold = self.threshold + 0.25
+
+    monkeypatch.setattr(FusedForestScorer, "__init__", corrupted_init)
+    service = loaded_service_factory()
+
+    assert service._fused is None
+    assert service.predict(flow) == expected_single
+    assert loaded_service_factory().predict_batch([flow, make_flow(bps=10.0)]) == expected_batch
+
+@pytest.mark.parametrize("database_url", ["sqlite://", "sqlite:///scores.db"])
+def test_engine_accepts_sqlite_urls(database_url, tmp_path, monkeypatch):
+    # 메모리 sqlite는 SingletonThreadPool이라 pool_size/max_overflow를 넘기면 create_engine이 실패한다.
+    monkeypatch.chdir(tmp_path)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        service = ModelService(database_url=database_url, db_pool_size=2, db_max_overflow=3)
+    assert service.engine is not None
+
+
+def test_chunked_iso_span_matches_unchunked_scoring(loaded_service_factory, tmp_path, monkeypatch):
+    source = make_service()
+    if not source.dataset_path.exists():
+        pytest.skip("bundled dataset is not available")
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    for name in ("enc_src_ip.pkl", "enc_dst_ip.pkl", "scaler.pkl", "isolation_forest.pkl", "rf_model.pkl"):
+        shutil.copy(source.model_dir / name, model_dir / name)
+
+    # 작은 청크를 두 스레드에 나눠 돌리고, 넘겨받은 블록을 모아 한 번에 점수 낸 결과와 비교한다.
+    monkeypatch.setattr(model_module, "ISO_SPAN_CHUNK_ROWS", 997)
+    blocks = []
+    chunk_span = ModelService._iso_chunk_span
+
+    def recording_chunk_span(self, block):
+        blocks.append(block.copy())
+        return chunk_span(self, block)
+
+    monkeypatch.setattr(ModelService, "_iso_chunk_span", recording_chunk_span)
+    service = make_service(model_dir=model_dir, n_jobs=2)
+
+    assert len(blocks) > 1
+    scores = service.iso_model.decision_function(service._scale_to_float32(np.vstack(blocks)))
+    assert service.iso_decision_min == float(scores.min())
+    assert service.iso_decision_max == float(scores.max())
+
+
+@pytest.mark.parametrize("name", ["dataset.csv", "attacker.csv"])
+def test_pyarrow_csv_engine_matches_c_engine(name, monkeypatch):
+    pytest.importorskip("pyarrow")
+
+    path = make_service().dataset_path.with_name(name)
+    if not path.exists():
+        pytest.skip(f"bundled {name} is not available")
+    columns = ModelService.base_feature_columns + ["start_time", "end_time", "label", "src_port", "dst_port", "proto", "pps"]
+    monkeypatch.setattr(model_module, "CSV_PYARROW_ENGINE", False)
+    c_frame = ModelService._read_flow_table(path, columns)
+    monkeypatch.setattr(model_module, "CSV_PYARROW_ENGINE", True)
+    arrow_frame = ModelService._read_flow_table(path, columns)
+    # pyarrow는 시각 문자열을 UTC로 다시 써서 돌려주므로, 파이프라인처럼 파싱한 뒤 비교한다.
+    for frame in (c_frame, arrow_frame):
+        for column in ("start_time", "end_time"):
+            frame[column] = ModelService._parse_start_times(frame[column])
+    pd.testing.assert_frame_equal(arrow_frame, c_frame)